@@ -0,0 +1,133 @@
+"""Archivado de histórico: mueve registros cerrados fuera de las tablas activas.
+
+Uso manual (o desde un cron):  python archive.py [meses]
+"""
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.orm import Session
+from datetime import datetime
+import os
+import sys
+
+from database import SessionLocal, engine
+import models
+
+# Meses que se mantienen en las tablas activas
+ARCHIVE_MONTHS = int(os.getenv("ARCHIVE_MONTHS", "12"))
+
+def month_start(d):
+    return datetime(d.year, d.month, 1)
+
+def add_months(d, n):
+    m = d.month - 1 + n
+    return datetime(d.year + m // 12, m % 12 + 1, 1)
+
+def period_bounds(month=None, year=None):
+    """Rango [inicio, fin) para un mes/año; None si no hay año (abarca todos los años)."""
+    if not year:
+        return None
+    start = datetime(year, month or 1, 1)
+    return start, add_months(start, 1 if month else 12)
+
+def includes_archive(db: Session, archive_model, month=None, year=None):
+    """Indica si el periodo pedido puede contener registros ya archivados."""
+    newest = db.query(func.max(archive_model.date)).scalar()
+    if newest is None:
+        return False
+    bounds = period_bounds(month, year)
+    return bounds is None or bounds[0] <= newest
+
+ARCHIVE_MODELS = (models.DeliveryArchive, models.LaundryArchive, models.LaundryReturnArchive)
+
+def ensure_schema(bind=engine):
+    # create_all no agrega índices a tablas que ya existían
+    for model in (models.Laundry,) + ARCHIVE_MODELS:
+        for index in model.__table__.indexes:
+            index.create(bind=bind, checkfirst=True)
+
+def tables_reusing_ids(db: Session):
+    """Tablas activas de SQLite creadas sin AUTOINCREMENT (anteriores a sqlite_autoincrement).
+
+    create_all no las modifica, y en ellas SQLite reutilizaría los ids de filas archivadas.
+    """
+    if db.get_bind().dialect.name != "sqlite":
+        return []
+    reusing = []
+    for model in (models.Delivery, models.Laundry, models.LaundryReturn):
+        sql = db.execute(
+            text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": model.__tablename__},
+        ).scalar()
+        if sql and "AUTOINCREMENT" not in sql.upper():
+            reusing.append(model.__tablename__)
+    return reusing
+
+def _ensure_partitions(db: Session, table, first, until):
+    """Crea las particiones mensuales (solo Postgres) entre first y until."""
+    if db.get_bind().dialect.name != "postgresql" or first is None:
+        return
+    start = month_start(first)
+    while start < until:
+        end = add_months(start, 1)
+        db.execute(text(
+            f'CREATE TABLE IF NOT EXISTS {table}_{start:%Y_%m} PARTITION OF {table} '
+            f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+        ))
+        start = end
+
+def _move(db: Session, hot_model, archive_model, condition):
+    columns = [c.name for c in archive_model.__table__.columns]
+    condition = condition & hot_model.date.isnot(None)
+    first = db.query(func.min(hot_model.date)).filter(condition).scalar()
+    last = db.query(func.max(hot_model.date)).filter(condition).scalar()
+    if first is None:
+        return 0
+    _ensure_partitions(db, archive_model.__tablename__, first, add_months(last, 1))
+    hot_cols = [getattr(hot_model, c) for c in columns]
+    db.execute(insert(archive_model).from_select(columns, select(*hot_cols).where(condition)))
+    return db.query(hot_model).filter(condition).delete(synchronize_session=False)
+
+def archive_closed_records(db: Session, months: int = ARCHIVE_MONTHS):
+    """Mueve entregas y guías completas con más de `months` meses a las tablas de archivo."""
+    if months < 1:
+        raise ValueError("months debe ser al menos 1")
+    reusing = tables_reusing_ids(db)
+    if reusing:
+        raise RuntimeError(
+            "Estas tablas reutilizarían ids archivados; recréelas con AUTOINCREMENT antes de archivar: "
+            + ", ".join(reusing)
+        )
+    cutoff = add_months(month_start(datetime.now()), -months)
+
+    closed = models.Laundry.status.in_(models.CLOSED_LAUNDRY_STATUSES) & (models.Laundry.date < cutoff)
+    closed_guides = select(models.Laundry.guide_number).where(closed)
+    try:
+        # Las devoluciones sin fecha se archivan con la fecha de su guía
+        guide_date = select(models.Laundry.date).where(
+            models.Laundry.guide_number == models.LaundryReturn.guide_number
+        ).scalar_subquery()
+        db.query(models.LaundryReturn).filter(
+            models.LaundryReturn.date.is_(None),
+            models.LaundryReturn.guide_number.in_(closed_guides),
+        ).update({models.LaundryReturn.date: guide_date}, synchronize_session=False)
+
+        # Las devoluciones primero, mientras sus guías siguen en la tabla activa
+        returns = _move(db, models.LaundryReturn, models.LaundryReturnArchive,
+                        models.LaundryReturn.guide_number.in_(closed_guides))
+        laundry = _move(db, models.Laundry, models.LaundryArchive, closed)
+        deliveries = _move(db, models.Delivery, models.DeliveryArchive,
+                           models.Delivery.date < cutoff)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return {"cutoff": cutoff, "deliveries": deliveries, "laundry": laundry, "laundry_returns": returns}
+
+if __name__ == "__main__":
+    models.Base.metadata.create_all(bind=engine)
+    ensure_schema()
+    db = SessionLocal()
+    try:
+        months = int(sys.argv[1]) if len(sys.argv) > 1 else ARCHIVE_MONTHS
+        print(archive_closed_records(db, months))
+    finally:
+        db.close()
@@ -2,9 +2,10 @@ from fastapi import FastAPI, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from sqlalchemy import extract
 from database import SessionLocal, engine, Base
-import models, schemas
+import models, schemas, archive
 from datetime import date, datetime
 import json
+import heapq
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
 import os
@@ -27,6 +28,7 @@ else:
 os.makedirs(PDF_DIR, exist_ok=True)
 
 models.Base.metadata.create_all(bind=engine)
+archive.ensure_schema(engine)
 
 app = FastAPI()
 
@@ -45,6 +47,18 @@ def get_db():
     finally:
         db.close()
 
+def filter_period(q, model, month=None, year=None):
+    # Con año se filtra por rango para aprovechar índices y particiones
+    bounds = archive.period_bounds(month, year)
+    if bounds:
+        return q.filter(model.date >= bounds[0], model.date < bounds[1])
+    if month: q = q.filter(extract('month', model.date) == month)
+    return q
+
+def merge_by_date(*lists):
+    # Cada lista ya viene ordenada por fecha descendente, nulos primero
+    return list(heapq.merge(*lists, key=lambda r: (r.date is None, r.date or datetime.min), reverse=True))
+
 # --- USUARIOS ---
 @app.get("/api/users/{dni}", response_model=schemas.User)
 def read_user(dni: str, db: Session = Depends(get_db)):
@@ -162,14 +176,21 @@ def create_delivery(delivery: schemas.DeliveryCreate, db: Session = Depends(get_
 @app.get("/api/deliveries/{delivery_id}/pdf")
 def get_pdf(delivery_id: int, db: Session = Depends(get_db)):
     delivery = db.query(models.Delivery).filter(models.Delivery.id == delivery_id).first()
+    if not delivery:
+        delivery = db.query(models.DeliveryArchive).filter(models.DeliveryArchive.id == delivery_id).first()
+    if not delivery: raise HTTPException(status_code=404)
     return FileResponse(delivery.pdf_path, media_type="application/pdf")
 
 # --- LAVANDERÍA CON CÁLCULO DE PENDIENTES ---
 @app.get("/api/laundry/{guide_number}/status")
 def get_laundry_status(guide_number: str, db: Session = Depends(get_db)):
     laundry = db.query(models.Laundry).filter(models.Laundry.guide_number == guide_number).first()
+    return_model = models.LaundryReturn
+    if not laundry:
+        laundry = db.query(models.LaundryArchive).filter(models.LaundryArchive.guide_number == guide_number).first()
+        return_model = models.LaundryReturnArchive
     if not laundry: raise HTTPException(status_code=404)
-    returns = db.query(models.LaundryReturn).filter(models.LaundryReturn.guide_number == guide_number).all()
+    returns = db.query(return_model).filter(return_model.guide_number == guide_number).all()
     sent_items = json.loads(laundry.items_json)
     ret_map = {}
     for r in returns:
@@ -180,6 +201,11 @@ def get_laundry_status(guide_number: str, db: Session = Depends(get_db)):
 @app.post("/api/laundry/return")
 def create_laundry_return(ret: schemas.LaundryReturnCreate, db: Session = Depends(get_db)):
     laundry = db.query(models.Laundry).filter(models.Laundry.guide_number == ret.guide_number).first()
+    if not laundry:
+        archived = db.query(models.LaundryArchive).filter(models.LaundryArchive.guide_number == ret.guide_number).first()
+        if archived:
+            raise HTTPException(status_code=400, detail="La guía está completa y archivada")
+        raise HTTPException(status_code=404, detail="Guía no encontrada")
     new_ret = models.LaundryReturn(guide_number=ret.guide_number, date=datetime.now(), items_json=json.dumps([i.dict() for i in ret.items]))
     db.add(new_ret)
     db.commit()
@@ -192,7 +218,8 @@ def create_laundry_return(ret: schemas.LaundryReturnCreate, db: Session = Depend
 @app.post("/api/laundry")
 def create_laundry(laundry: schemas.LaundryCreate, db: Session = Depends(get_db)):
     # Verificar si ya existe
-    existing = db.query(models.Laundry).filter(models.Laundry.guide_number == laundry.guide_number).first()
+    existing = db.query(models.Laundry).filter(models.Laundry.guide_number == laundry.guide_number).first() or \
+        db.query(models.LaundryArchive).filter(models.LaundryArchive.guide_number == laundry.guide_number).first()
     if existing:
         raise HTTPException(status_code=400, detail="Número de guía ya registrado")
     
@@ -211,12 +238,14 @@ def create_laundry(laundry: schemas.LaundryCreate, db: Session = Depends(get_db)
 # --- DASHBOARD & REPORTES ---
 @app.get("/api/stats")
 def get_stats(month: int = None, year: int = None, db: Session = Depends(get_db)):
-    laundry_q = db.query(models.Laundry)
-    if year: laundry_q = laundry_q.filter(extract('year', models.Laundry.date) == year)
-    if month: laundry_q = laundry_q.filter(extract('month', models.Laundry.date) == month)
+    laundry_q = filter_period(db.query(models.Laundry), models.Laundry, month, year)
+    records = laundry_q.all()
+    # Sin año el tablero solo cubre las tablas activas; el histórico se pide por año
+    if year and archive.includes_archive(db, models.LaundryArchive, month, year):
+        records += filter_period(db.query(models.LaundryArchive), models.LaundryArchive, month, year).all()
     
     p, pa, ch = 0, 0, 0
-    for r in laundry_q.all():
+    for r in records:
         for i in json.loads(r.items_json):
             n = i['name'].lower()
             if 'polo' in n: p += i['qty']
@@ -227,20 +256,27 @@ def get_stats(month: int = None, year: int = None, db: Session = Depends(get_db)
         "users_count": db.query(models.User).count(),
         "deliveries_count": db.query(models.Delivery).count(),
         "laundry_polos_count": p, "laundry_pantalones_count": pa, "laundry_chaquetas_count": ch,
-        "laundry_active_count": laundry_q.filter(models.Laundry.status != "Completo").count()
+        "laundry_active_count": laundry_q.filter(models.Laundry.status.notin_(models.CLOSED_LAUNDRY_STATUSES)).count()
     }
 
 @app.get("/api/reports/laundry")
 def get_laundry_report(guide_number: str = None, month: int = None, year: int = None, db: Session = Depends(get_db)):
-    q = db.query(models.Laundry)
-    if guide_number: q = q.filter(models.Laundry.guide_number == guide_number)
-    if month: q = q.filter(extract('month', models.Laundry.date) == month)
-    if year: q = q.filter(extract('year', models.Laundry.date) == year)
-    
-    services = q.order_by(models.Laundry.date.desc()).all()
+    models_list = [models.Laundry]
+    # Sin año ni guía el reporte solo cubre las tablas activas
+    if (year or guide_number) and archive.includes_archive(db, models.LaundryArchive, month, year):
+        models_list.append(models.LaundryArchive)
+
+    results = []
+    for model in models_list:
+        q = filter_period(db.query(model), model, month, year)
+        if guide_number: q = q.filter(model.guide_number == guide_number)
+        results.append(q.order_by(model.date.desc().nulls_first()).all())
+    services = merge_by_date(*results)
+
     res = []
     for s in services:
-        returns = db.query(models.LaundryReturn).filter(models.LaundryReturn.guide_number == s.guide_number).all()
+        return_model = models.LaundryReturnArchive if isinstance(s, models.LaundryArchive) else models.LaundryReturn
+        returns = db.query(return_model).filter(return_model.guide_number == s.guide_number).all()
         ret_map = {}
         last_return_date = None
         for r in returns:
@@ -266,12 +302,17 @@ def get_laundry_report(guide_number: str = None, month: int = None, year: int =
 
 @app.get("/api/delivery/report")
 def get_delivery_report(month: int = None, year: int = None, db: Session = Depends(get_db)):
-    q = db.query(models.Delivery)
-    if month: q = q.filter(extract('month', models.Delivery.date) == month)
-    if year: q = q.filter(extract('year', models.Delivery.date) == year)
-    
+    results = []
+    for model in (models.Delivery, models.DeliveryArchive):
+        # Sin año el reporte solo cubre la tabla activa
+        if model is models.DeliveryArchive and not (year and archive.includes_archive(db, model, month, year)):
+            continue
+        q = filter_period(db.query(model), model, month, year)
+        results.append(q.order_by(model.date.desc().nulls_first()).all())
+    deliveries = merge_by_date(*results)
+
     res = []
-    for d in q.order_by(models.Delivery.date.desc()).all():
+    for d in deliveries:
         user = db.query(models.User).filter(models.User.dni == d.dni).first()
         items = json.loads(d.items_json)
         items_str = ", ".join([f"{i['qty']} {i['name']}" for i in items])
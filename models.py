@@ -1,6 +1,9 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index
 from database import Base
 
+# Estados de guía cerrada ("Completa" es el valor antiguo de algunos registros)
+CLOSED_LAUNDRY_STATUSES = ("Completo", "Completa")
+
 class User(Base):
     __tablename__ = "users"
 
@@ -12,6 +15,8 @@ class User(Base):
 
 class Delivery(Base):
     __tablename__ = "deliveries"
+    # Sin AUTOINCREMENT, SQLite reutiliza los ids de filas ya archivadas
+    __table_args__ = {"sqlite_autoincrement": True}
 
     id = Column(Integer, primary_key=True, index=True)
     dni = Column(String, index=True) # Linked to User DNI
@@ -28,8 +33,19 @@ class Laundry(Base):
     items_json = Column(Text)
     status = Column(String, default="Pendiente") # "Pendiente", "Parcial", "Completado"
 
+    # Índice parcial: solo guías activas (las completas se archivan con el tiempo)
+    __table_args__ = (
+        Index(
+            "ix_laundry_open_date", "date",
+            postgresql_where=status.notin_(CLOSED_LAUNDRY_STATUSES),
+            sqlite_where=status.notin_(CLOSED_LAUNDRY_STATUSES),
+        ),
+        {"sqlite_autoincrement": True},
+    )
+
 class LaundryReturn(Base):
     __tablename__ = "laundry_returns"
+    __table_args__ = {"sqlite_autoincrement": True}
 
     id = Column(Integer, primary_key=True, index=True)
     guide_number = Column(String, index=True)
@@ -45,3 +61,36 @@ class UniformReturn(Base):
     observations = Column(Text, nullable=True)
     date = Column(DateTime)
 
+# --- HISTÓRICO (ver archive.py) ---
+# En Postgres son tablas particionadas por mes (RANGE sobre date); en SQLite
+# el argumento de partición se ignora y quedan como tablas de archivo simples.
+# La clave primaria incluye date porque Postgres lo exige en tablas particionadas.
+
+class DeliveryArchive(Base):
+    __tablename__ = "deliveries_archive"
+    __table_args__ = {"postgresql_partition_by": "RANGE (date)"}
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    date = Column(DateTime, primary_key=True, index=True)
+    dni = Column(String, index=True)
+    items_json = Column(Text)
+    pdf_path = Column(String)
+
+class LaundryArchive(Base):
+    __tablename__ = "laundry_archive"
+    __table_args__ = {"postgresql_partition_by": "RANGE (date)"}
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    date = Column(DateTime, primary_key=True, index=True)
+    guide_number = Column(String, index=True)
+    items_json = Column(Text)
+    status = Column(String)
+
+class LaundryReturnArchive(Base):
+    __tablename__ = "laundry_returns_archive"
+    __table_args__ = {"postgresql_partition_by": "RANGE (date)"}
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    date = Column(DateTime, primary_key=True, index=True)
+    guide_number = Column(String, index=True)
+    items_json = Column(Text)
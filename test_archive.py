@@ -0,0 +1,108 @@
+import os
+import json
+import tempfile
+from datetime import datetime
+
+# Base SQLite temporal: debe definirse antes de importar database/main
+DB_PATH = os.path.join(tempfile.mkdtemp(), "archive_test.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+import main, models, schemas, archive
+
+OLD = datetime(2020, 3, 5)
+ITEMS = json.dumps([{"name": "Polo", "qty": 2}])
+
+def expect_http_error(code, fn, *args):
+    try:
+        fn(*args)
+    except HTTPException as e:
+        assert e.status_code == code, e.status_code
+        return
+    raise AssertionError(f"Se esperaba HTTP {code}")
+
+def test_archive():
+    db = main.SessionLocal()
+    db.add_all([
+        models.Laundry(guide_number="G1", date=OLD, items_json=ITEMS, status="Completo"),
+        models.Laundry(guide_number="G2", date=OLD, items_json=ITEMS, status="Completa"),
+        models.Laundry(guide_number="G3", date=OLD, items_json=ITEMS, status="Pendiente"),
+        models.LaundryReturn(guide_number="G1", date=OLD, items_json=json.dumps([{"name": "Polo", "qty": 1}])),
+        models.LaundryReturn(guide_number="G1", date=None, items_json=json.dumps([{"name": "Polo", "qty": 1}])),
+        models.Delivery(dni="1", date=OLD, items_json=ITEMS, pdf_path=""),
+    ])
+    db.commit()
+
+    # "Completa" (valor antiguo) no cuenta como guía activa
+    stats = main.get_stats(month=3, year=2020, db=db)
+    assert stats["laundry_active_count"] == 1, stats
+
+    try:
+        archive.archive_closed_records(db, 0)
+        raise AssertionError("months=0 debería fallar")
+    except ValueError:
+        pass
+
+    moved = archive.archive_closed_records(db, 6)
+    print(f"Archivado: {moved}")
+    assert (moved["deliveries"], moved["laundry"], moved["laundry_returns"]) == (1, 2, 2), moved
+    assert db.query(models.Laundry).count() == 1
+    assert db.query(models.LaundryReturn).count() == 0
+    assert db.query(models.Delivery).count() == 0
+
+    # Consultas que caen en el archivo
+    assert main.get_laundry_status("G1", db) == [{"name": "Polo", "pending": 0}]
+    report = main.get_laundry_report(guide_number=None, month=3, year=2020, db=db)
+    assert sorted(r["guide_number"] for r in report) == ["G1", "G2", "G3"], report
+    assert len(main.get_delivery_report(month=3, year=2020, db=db)) == 1
+    report = main.get_laundry_report(guide_number="G1", month=None, year=None, db=db)
+    assert [r["guide_number"] for r in report] == ["G1"], report
+
+    # Los reportes sin año ni guía solo leen las tablas activas (tablero)
+    db.add(models.Laundry(guide_number="G4", date=datetime.now(), items_json=ITEMS, status="Pendiente"))
+    db.commit()
+    report = main.get_laundry_report(guide_number=None, month=None, year=None, db=db)
+    assert [r["guide_number"] for r in report] == ["G4", "G3"], report
+    assert main.get_delivery_report(month=None, year=None, db=db) == []
+
+    # El tablero sin año solo lee las tablas activas
+    stats = main.get_stats(month=None, year=None, db=db)
+    assert stats["laundry_polos_count"] == 4 and stats["deliveries_count"] == 0, stats
+    stats = main.get_stats(month=3, year=2020, db=db)
+    assert stats["laundry_polos_count"] == 6, stats
+
+    # Guías archivadas: no se duplican ni aceptan devoluciones
+    expect_http_error(400, main.create_laundry, schemas.LaundryCreate(guide_number="G1", items=[]), db)
+    ret = schemas.LaundryReturnCreate(guide_number="G1", items=[{"name": "Polo", "qty": 1}])
+    expect_http_error(400, main.create_laundry_return, ret, db)
+    assert db.query(models.LaundryReturn).count() == 0
+
+    # SQLite no debe reutilizar el id de la entrega archivada
+    new_delivery = models.Delivery(dni="1", date=datetime.now(), items_json=ITEMS, pdf_path="")
+    db.add(new_delivery)
+    db.commit()
+    assert new_delivery.id == 2, new_delivery.id
+
+    db.close()
+    print("OK")
+
+def test_archive_refuses_legacy_sqlite_tables():
+    # Tablas creadas antes de sqlite_autoincrement: archivar reutilizaría ids
+    legacy = create_engine("sqlite://")
+    with legacy.begin() as conn:
+        for table in ("deliveries", "laundry", "laundry_returns"):
+            conn.execute(text(f"CREATE TABLE {table} (id INTEGER PRIMARY KEY, date DATETIME)"))
+    with Session(legacy) as db:
+        assert archive.tables_reusing_ids(db) == ["deliveries", "laundry", "laundry_returns"]
+        try:
+            archive.archive_closed_records(db, 6)
+            raise AssertionError("Debería rechazar tablas sin AUTOINCREMENT")
+        except RuntimeError:
+            pass
+    print("OK")
+
+if __name__ == "__main__":
+    test_archive()
+    test_archive_refuses_legacy_sqlite_tables()